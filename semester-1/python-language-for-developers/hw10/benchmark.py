@@ -0,0 +1,354 @@
+import argparse
+import json
+import os
+import platform
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from urllib.parse import quote
+
+import httpx
+import sqlalchemy
+from sqlalchemy.exc import OperationalError
+from fastapi.testclient import TestClient
+
+# main.py создает подключение при импорте, поэтому до импорта подменяем базу
+# на in-memory, чтобы не трогать students.db; для замеров она заменяется на свою
+os.environ.setdefault('STUDENTS_DB_URL', 'sqlite://')
+
+import main as api
+from generate_students import StudentGenerator
+from models import StudentDatabase
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = ['1e4', '1e5']
+FACULTY = 'АВТФ'
+COURSE = 'Мат. Анализ'
+SEARCH_PREFIX = 'Смит Ив'
+SEARCH_FUZZY = 'Смирноф'
+NEW_STUDENT = {
+    'lastname': 'Бенчмарков',
+    'firstname': 'Тест',
+    'faculty': FACULTY,
+    'course': COURSE,
+    'score': 50,
+}
+
+
+def summarize(name: str, target: str, size: int, timings: List[float]) -> Dict:
+    ordered = sorted(timings)
+    return {
+        'name': name,
+        'target': target,
+        'size': size,
+        'repeats': len(ordered),
+        'min_s': ordered[0],
+        'median_s': statistics.median(ordered),
+        'mean_s': statistics.fmean(ordered),
+        'p95_s': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max_s': ordered[-1],
+    }
+
+
+def measure(fn: Callable, repeats: int) -> List[float]:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def remove_db(db_path: str):
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+
+def prepare_csv(workdir: str, size: int, seed: int) -> str:
+    csv_path = os.path.join(workdir, f'students_{size}_{seed}.csv')
+    if not os.path.exists(csv_path):
+        print(f"Генерация {csv_path}")
+        StudentGenerator(os.path.join(BASE_DIR, 'students.csv'), seed=seed).write_csv(csv_path, size)
+    return csv_path
+
+
+def bench_models(db, size: int, repeats: int) -> List[Dict]:
+    middle_id = size // 2 or 1
+    queries = {
+        'select_all': lambda: db.select_all(),
+        'select_by_id': lambda: db.select_by_id(middle_id),
+        'get_students_by_faculty': lambda: db.get_students_by_faculty(FACULTY),
+        'get_unique_courses': lambda: db.get_unique_courses(),
+        'get_average_score_by_faculty': lambda: db.get_average_score_by_faculty(FACULTY),
+        'get_students_by_course_low_score': lambda: db.get_students_by_course_low_score(COURSE),
+        'search_students (prefix)': lambda: db.search_students(SEARCH_PREFIX),
+        'search_students (fuzzy)': lambda: db.search_students(SEARCH_FUZZY, mode='fuzzy'),
+        'get_top_students': lambda: db.get_top_students('course', COURSE),
+        'get_bottom_students': lambda: db.get_bottom_students('faculty', FACULTY),
+        'get_students_by_percentile': lambda: db.get_students_by_percentile('course', COURSE, 5, limit=100),
+        'get_student_rank': lambda: db.get_student_rank(middle_id),
+    }
+    results = [summarize(name, 'model', size, measure(fn, repeats)) for name, fn in queries.items()]
+
+    # Запись измеряется циклом insert -> update -> delete, чтобы объем данных не менялся
+    timings: Dict[str, List[float]] = {'insert_student': [], 'update_student': [], 'delete_student': []}
+    for _ in range(repeats):
+        start = time.perf_counter()
+        student = db.insert_student(**NEW_STUDENT)
+        timings['insert_student'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        db.update_student(student.id, score=75)
+        timings['update_student'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        db.delete_student(student.id)
+        timings['delete_student'].append(time.perf_counter() - start)
+
+    results += [summarize(name, 'model', size, values) for name, values in timings.items()]
+    return results
+
+
+def bench_endpoints(client: httpx.Client, target: str, size: int, repeats: int) -> List[Dict]:
+    middle_id = size // 2 or 1
+    faculty = quote(FACULTY)
+    course = quote(COURSE)
+    endpoints = {
+        'GET /students/': f'/students/?skip={middle_id}&limit=100',
+        'GET /students/{student_id}': f'/students/{middle_id}',
+        'GET /students/faculty/{faculty}': f'/students/faculty/{faculty}',
+        'GET /courses/': '/courses/',
+        'GET /faculty/{faculty}/average': f'/faculty/{faculty}/average',
+        'GET /students/course/{course}/low-scores': f'/students/course/{course}/low-scores',
+        'GET /statistics/': '/statistics/',
+        'GET /students/search (prefix)': f'/students/search?q={quote(SEARCH_PREFIX)}',
+        'GET /students/search (fuzzy)': f'/students/search?q={quote(SEARCH_FUZZY)}&mode=fuzzy',
+        'GET /rankings/{group}/{name}/top': f'/rankings/course/{course}/top',
+        'GET /rankings/{group}/{name}/bottom': f'/rankings/faculty/{faculty}/bottom',
+        'GET /rankings/{group}/{name}/percentile': f'/rankings/course/{course}/percentile?p=5',
+        'GET /rankings/students/{student_id}': f'/rankings/students/{middle_id}',
+    }
+
+    results = []
+    for name, url in endpoints.items():
+        timings = measure(lambda: client.get(url).raise_for_status(), repeats)
+        results.append(summarize(name, target, size, timings))
+
+    timings = {'POST /students/': [], 'PUT /students/{student_id}': [], 'DELETE /students/{student_id}': []}
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = client.post('/students/', json=NEW_STUDENT)
+        response.raise_for_status()
+        timings['POST /students/'].append(time.perf_counter() - start)
+        student_id = response.json()['id']
+
+        start = time.perf_counter()
+        client.put(f'/students/{student_id}', json={'score': 75}).raise_for_status()
+        timings['PUT /students/{student_id}'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        client.delete(f'/students/{student_id}').raise_for_status()
+        timings['DELETE /students/{student_id}'].append(time.perf_counter() - start)
+
+    results += [summarize(name, target, size, values) for name, values in timings.items()]
+    return results
+
+
+def set_journal_mode(db_path: str, mode: str):
+    connection = sqlite3.connect(db_path)
+    try:
+        connection.execute(f"PRAGMA journal_mode={mode}")
+    finally:
+        connection.close()
+
+
+def bench_concurrent(db_path: str, size: int, tuned: bool, readers: int, writers: int,
+                     duration: float) -> List[Dict]:
+    # Журнал WAL сохраняется в файле базы, поэтому режим по умолчанию
+    # замеряется с явно возвращенным rollback-журналом
+    set_journal_mode(db_path, 'WAL' if tuned else 'DELETE')
+    db = StudentDatabase(f'sqlite:///{db_path}', tuned=tuned)
+    target = 'concurrent-tuned' if tuned else 'concurrent-default'
+    middle_id = size // 2 or 1
+
+    timings: Dict[str, List[float]] = {'reads': [], 'writes': []}
+    errors = {'reads': 0, 'writes': 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def record(kind: str, fn: Callable):
+        local_timings = []
+        local_errors = 0
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                fn()
+            except OperationalError:
+                local_errors += 1
+                continue
+            local_timings.append(time.perf_counter() - start)
+        with lock:
+            timings[kind] += local_timings
+            errors[kind] += local_errors
+
+    def read():
+        db.select_by_id(middle_id)
+        db.get_average_score_by_faculty(FACULTY)
+
+    def write():
+        student = db.insert_student(**NEW_STUDENT)
+        db.update_student(student.id, score=75)
+        db.delete_student(student.id)
+
+    threads = [threading.Thread(target=record, args=('reads', read)) for _ in range(readers)]
+    threads += [threading.Thread(target=record, args=('writes', write)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db.engine.dispose()
+
+    results = []
+    for kind, values in timings.items():
+        row = summarize(kind, target, size, values or [float('nan')])
+        row.update({
+            'threads': readers if kind == 'reads' else writers,
+            'duration_s': duration,
+            'throughput_ops_s': len(values) / duration,
+            'errors': errors[kind],
+        })
+        results.append(row)
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_url: str, tuned: bool, port: int, timeout: float = 30.0) -> subprocess.Popen:
+    env = dict(os.environ, STUDENTS_DB_URL=db_url, STUDENTS_DB_TUNED='1' if tuned else '0')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1',
+         '--port', str(port), '--log-level', 'warning'],
+        cwd=BASE_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Сервер завершился при запуске")
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/openapi.json').raise_for_status()
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("Сервер не запустился за отведенное время")
+
+
+def run_size(size: int, args) -> List[Dict]:
+    csv_path = prepare_csv(args.workdir, size, args.seed)
+    db_path = os.path.abspath(os.path.join(args.workdir, f'students_{size}.db'))
+    db_url = f'sqlite:///{db_path}'
+    remove_db(db_path)
+
+    db = StudentDatabase(db_url, tuned=args.tuned)
+    start = time.perf_counter()
+    count = db.load_from_csv(csv_path)
+    results = [summarize('load_from_csv', 'model', size, [time.perf_counter() - start])]
+    print(f"[{size}] load_from_csv: {count} записей за {results[0]['min_s']:.3f} с")
+
+    mismatches = db.get_score_counts_mismatches()
+    if mismatches:
+        raise RuntimeError(f"Гистограмма оценок расходится с таблицей после загрузки: {mismatches[:5]}")
+
+    results += bench_models(db, size, args.repeats)
+
+    api.db = db
+    with TestClient(api.app) as client:
+        results += bench_endpoints(client, 'asgi', size, args.repeats)
+
+    if not args.skip_http:
+        port = free_port()
+        server = start_server(db_url, args.tuned, port)
+        try:
+            with httpx.Client(base_url=f'http://127.0.0.1:{port}', timeout=None) as client:
+                results += bench_endpoints(client, 'http', size, args.repeats)
+        finally:
+            server.terminate()
+            server.wait()
+
+    db.engine.dispose()
+
+    if args.concurrency:
+        for tuned in (False, True):
+            results += bench_concurrent(db_path, size, tuned, args.concurrency, args.writers, args.duration)
+
+    if not args.keep_db:
+        remove_db(db_path)
+    return results
+
+
+def print_results(results: List[Dict]):
+    print(f"{'size':>10}  {'target':<18}  {'name':<42}  {'median, ms':>11}  {'p95, ms':>9}  {'ops/s':>9}")
+    for row in results:
+        throughput = f"{row['throughput_ops_s']:>9.1f}" if 'throughput_ops_s' in row else ''
+        print(f"{row['size']:>10}  {row['target']:<18}  {row['name']:<42}  "
+              f"{row['median_s'] * 1000:>11.3f}  {row['p95_s'] * 1000:>9.3f}  {throughput}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Бенчмарк StudentDatabase и эндпойнтов hw10')
+    parser.add_argument('--sizes', nargs='+', default=DEFAULT_SIZES, help='размеры наборов данных, например 1e4 1e6')
+    parser.add_argument('--repeats', type=int, default=5, help='количество повторов каждого замера')
+    parser.add_argument('--seed', type=int, default=42, help='seed генератора данных')
+    parser.add_argument('--workdir', default='bench_data', help='каталог для CSV и баз данных')
+    parser.add_argument('--output', default='bench_results.json', help='файл с результатами в JSON')
+    parser.add_argument('--label', default='', help='метка запуска для сравнения результатов')
+    parser.add_argument('--skip-http', action='store_true', help='не запускать замеры через HTTP')
+    parser.add_argument('--tuned', action='store_true', help='использовать настроенный движок SQLite (WAL, пул)')
+    parser.add_argument('--concurrency', type=int, default=8, help='число читающих потоков в конкурентном замере, 0 - отключить')
+    parser.add_argument('--writers', type=int, default=2, help='число пишущих потоков в конкурентном замере')
+    parser.add_argument('--duration', type=float, default=3.0, help='длительность конкурентного замера, с')
+    parser.add_argument('--keep-db', action='store_true', help='не удалять базы данных после замеров')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    for size in (int(float(value)) for value in args.sizes):
+        results += run_size(size, args)
+
+    report = {
+        'meta': {
+            'label': args.label,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sqlite': sqlite3.sqlite_version,
+            'sqlalchemy': sqlalchemy.__version__,
+            'repeats': args.repeats,
+            'seed': args.seed,
+            'tuned': args.tuned,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+    print_results(results)
+    print(f"\nРезультаты сохранены в {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import argparse
+import csv
+import random
+from collections import Counter
+from itertools import accumulate
+from typing import Dict, List, Tuple
+
+FIELDNAMES = ['Фамилия', 'Имя', 'Факультет', 'Курс', 'Оценка']
+
+EXTRA_LASTNAMES = [
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов',
+    'Михайлов', 'Новиков', 'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев',
+    'Семенов', 'Егоров', 'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов',
+    'Андреев', 'Макаров', 'Никитин', 'Захаров', 'Зайцев', 'Соловьев', 'Борисов',
+    'Яковлев', 'Григорьев', 'Романов', 'Воробьев', 'Сергеев', 'Кузьмин', 'Фролов',
+    'Александров', 'Дмитриев', 'Королев', 'Гусев', 'Киселев', 'Ильин', 'Максимов',
+    'Поляков', 'Сорокин', 'Виноградов', 'Ковалев', 'Белов', 'Медведев', 'Антонов',
+    'Тарасов', 'Жуков', 'Баранов', 'Филиппов', 'Комаров', 'Давыдов', 'Беляев',
+]
+
+EXTRA_FIRSTNAMES = [
+    'Александр', 'Максим', 'Артем', 'Михаил', 'Даниил', 'Кирилл', 'Егор',
+    'Никита', 'Илья', 'Матвей', 'Роман', 'Сергей', 'Владимир', 'Павел',
+    'Анна', 'Елена', 'Ольга', 'Наталья', 'Татьяна', 'Анастасия', 'Дарья',
+    'Полина', 'Софья', 'Ксения', 'Алиса', 'Юлия', 'Виктория', 'Ирина',
+]
+
+MAX_SCORE = 100
+
+
+def zipf_weights(count: int, skew: float) -> List[float]:
+    return [1.0 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+def read_seed(seed_csv: str) -> Tuple[Counter, Counter, Dict[str, Counter]]:
+    lastnames = Counter()
+    firstnames = Counter()
+    courses_by_faculty: Dict[str, Counter] = {}
+
+    with open(seed_csv, 'r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            lastnames[row['Фамилия']] += 1
+            firstnames[row['Имя']] += 1
+            courses_by_faculty.setdefault(row['Факультет'], Counter())[row['Курс']] += 1
+
+    return lastnames, firstnames, courses_by_faculty
+
+
+def build_pool(seed_counts: Counter, extra: List[str], skew: float) -> Tuple[List[str], List[float]]:
+    # Сначала имена из исходного файла в порядке частоты, затем дополнительные,
+    # чтобы на больших объемах было много разных ФИО с длинным хвостом
+    names = [name for name, _ in seed_counts.most_common()]
+    names += [name for name in extra if name not in seed_counts]
+    return names, list(accumulate(zipf_weights(len(names), skew)))
+
+
+class StudentGenerator:
+
+    def __init__(self, seed_csv: str = 'students.csv', skew: float = 1.0, seed: int = 42):
+        lastnames, firstnames, courses_by_faculty = read_seed(seed_csv)
+
+        self.rng = random.Random(seed)
+        self.lastnames, self.lastname_weights = build_pool(lastnames, EXTRA_LASTNAMES, skew)
+        self.firstnames, self.firstname_weights = build_pool(firstnames, EXTRA_FIRSTNAMES, skew)
+
+        # Совместное распределение (факультет, курс) берется из исходного файла,
+        # skew > 1 усиливает перекос, skew < 1 сглаживает его
+        pairs = [
+            ((faculty, course), count)
+            for faculty, courses in courses_by_faculty.items()
+            for course, count in courses.items()
+        ]
+        self.faculty_courses = [pair for pair, _ in pairs]
+        self.faculty_course_weights = list(accumulate(count ** skew for _, count in pairs))
+
+    def generate_batch(self, size: int) -> List[Tuple[str, str, str, str, int]]:
+        rng = self.rng
+        lastnames = rng.choices(self.lastnames, cum_weights=self.lastname_weights, k=size)
+        firstnames = rng.choices(self.firstnames, cum_weights=self.firstname_weights, k=size)
+        faculty_courses = rng.choices(self.faculty_courses, cum_weights=self.faculty_course_weights, k=size)
+        return [
+            (lastname, firstname, faculty, course, rng.randint(0, MAX_SCORE))
+            for lastname, firstname, (faculty, course) in zip(lastnames, firstnames, faculty_courses)
+        ]
+
+    def write_csv(self, output_csv: str, rows: int, batch_size: int = 100_000) -> int:
+        written = 0
+        with open(output_csv, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(FIELDNAMES)
+            while written < rows:
+                batch = self.generate_batch(min(batch_size, rows - written))
+                writer.writerows(batch)
+                written += len(batch)
+        return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генерация синтетического students.csv произвольного размера')
+    parser.add_argument('rows', type=float, help='количество строк, например 1e6')
+    parser.add_argument('-o', '--output', default=None, help='выходной файл (по умолчанию students_<rows>.csv)')
+    parser.add_argument('--seed-csv', default='students.csv', help='исходный файл с распределениями')
+    parser.add_argument('--skew', type=float, default=1.0, help='степень перекоса распределений')
+    parser.add_argument('--seed', type=int, default=42, help='seed генератора случайных чисел')
+    args = parser.parse_args()
+
+    rows = int(args.rows)
+    output = args.output or f'students_{rows}.csv'
+
+    generator = StudentGenerator(args.seed_csv, skew=args.skew, seed=args.seed)
+    count = generator.write_csv(output, rows)
+    print(f"Сгенерировано записей: {count} -> {output}")
+
+
+if __name__ == '__main__':
+    main()
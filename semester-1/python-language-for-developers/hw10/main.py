@@ -1,15 +1,20 @@
-from fastapi import FastAPI, HTTPException, Depends, Query
+import os
+from fastapi import FastAPI, HTTPException, Depends, Path, Query
 from sqlalchemy.orm import Session
 from typing import List
 from models import StudentDatabase, Student
 from schemas import (
-    StudentCreate, StudentUpdate, StudentResponse,
+    StudentCreate, StudentUpdate, StudentResponse, StudentSearchResponse,
+    RankedStudentResponse, PercentileResponse, StudentRankResponse,
     AverageScoreResponse, StatisticsResponse
 )
 
 app = FastAPI(title="Students API")
 
-db = StudentDatabase()
+db = StudentDatabase(
+    os.environ.get('STUDENTS_DB_URL', 'sqlite:///students.db'),
+    tuned=os.environ.get('STUDENTS_DB_TUNED', '1') == '1'
+)
 
 
 def get_db():
@@ -39,6 +44,26 @@ def read_students(
     return students
 
 
+@app.get("/students/search", response_model=List[StudentSearchResponse])
+def search_students(
+    q: str = Query(..., min_length=1, max_length=100),
+    mode: str = Query("prefix", pattern="^(prefix|fuzzy)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100)
+):
+    try:
+        results = db.search_students(q, mode=mode, skip=skip, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [
+        StudentSearchResponse(
+            **StudentResponse.model_validate(student).model_dump(),
+            relevance=relevance
+        )
+        for student, relevance in results
+    ]
+
+
 @app.get("/students/{student_id}", response_model=StudentResponse)
 def read_student(student_id: int, session: Session = Depends(get_db)):
     student = session.query(Student).filter(Student.id == student_id).first()
@@ -136,6 +161,66 @@ def get_statistics(session: Session = Depends(get_db)):
     )
 
 
+def ranked_response(results) -> List[RankedStudentResponse]:
+    return [
+        RankedStudentResponse(**StudentResponse.model_validate(student).model_dump(), rank=rank)
+        for student, rank in results
+    ]
+
+
+@app.get("/rankings/students/{student_id}", response_model=StudentRankResponse)
+def get_student_rank(
+    student_id: int,
+    group: str = Query("course", pattern="^(course|faculty)$")
+):
+    rank = db.get_student_rank(student_id, group=group)
+    if not rank:
+        raise HTTPException(status_code=404, detail="Студент не найден")
+    return rank
+
+
+@app.get("/rankings/{group}/{name}/top", response_model=List[RankedStudentResponse])
+def get_top_students(
+    group: str = Path(..., pattern="^(course|faculty)$"),
+    name: str = Path(...),
+    n: int = Query(10, ge=1, le=1000)
+):
+    return ranked_response(db.get_top_students(group, name, n))
+
+
+@app.get("/rankings/{group}/{name}/bottom", response_model=List[RankedStudentResponse])
+def get_bottom_students(
+    group: str = Path(..., pattern="^(course|faculty)$"),
+    name: str = Path(...),
+    n: int = Query(10, ge=1, le=1000)
+):
+    return ranked_response(db.get_bottom_students(group, name, n))
+
+
+@app.get("/rankings/{group}/{name}/percentile", response_model=PercentileResponse)
+def get_students_by_percentile(
+    group: str = Path(..., pattern="^(course|faculty)$"),
+    name: str = Path(...),
+    p: float = Query(..., gt=0, le=100),
+    side: str = Query("bottom", pattern="^(bottom|top)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    cutoff, count, results = db.get_students_by_percentile(group, name, p, side=side, skip=skip, limit=limit)
+    if cutoff is None:
+        raise HTTPException(status_code=404, detail="Нет студентов в группе")
+    
+    return PercentileResponse(
+        group=group,
+        name=name,
+        percent=p,
+        side=side,
+        cutoff_score=cutoff,
+        count=count,
+        students=ranked_response(results)
+    )
+
+
 @app.post("/load-csv/")
 def load_csv_data():
     try:
@@ -146,9 +231,8 @@ def load_csv_data():
 
 
 @app.delete("/students/")
-def delete_all_students(session: Session = Depends(get_db)):
-    session.query(Student).delete()
-    session.commit()
+def delete_all_students():
+    db.clear_all()
     return {"message": "Все студенты удалены"}
 
 
@@ -1,12 +1,249 @@
-from sqlalchemy import create_engine, Column, Integer, String
+from sqlalchemy import create_engine, event, Column, Index, Integer, String
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy import func
+from sqlalchemy.pool import StaticPool
+from sqlalchemy import case, func, insert, or_, text
+from contextlib import contextmanager
+from contextvars import ContextVar
 import csv
-from typing import List, Optional, Dict
+import json
+import math
+import re
+from itertools import combinations
+from typing import Iterator, List, Optional, Dict, Tuple
 
 Base = declarative_base()
 
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+# Размер пула рассчитан на threadpool FastAPI (по умолчанию 40 потоков)
+POOL_SIZE = 10
+MAX_OVERFLOW = 30
+POOL_TIMEOUT = 30
+
+LOAD_BATCH_SIZE = 100_000
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+# Полнотекстовые индексы по ФИО: unicode61 с префиксным индексом для поиска по началу слова
+# и trigram для нечеткого поиска. Таблицы contentless, в индекс пишется нормализованный
+# текст (ё -> е), регистр сворачивает сам токенизатор, в том числе для кириллицы
+SEARCH_INDEXES = {
+    'students_fts': "tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'",
+    'students_trigram': "tokenize='trigram'",
+}
+
+# Триггеры на вставку и удаление пропускаются во время массовой загрузки и очистки:
+# флаг active выставляется в той же транзакции, поэтому другие соединения его не видят
+BULK_LOAD_DDL = (
+    "CREATE TABLE IF NOT EXISTS students_bulk_load (active INTEGER NOT NULL)",
+    "INSERT INTO students_bulk_load SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM students_bulk_load)",
+)
+
+SEARCH_TABLE_DDL = "CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(lastname, firstname, content='', {options})"
+
+SEARCH_TRIGGERS_DDL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON students
+    WHEN (SELECT active FROM students_bulk_load) = 0 BEGIN
+        INSERT INTO {index}(rowid, lastname, firstname)
+        VALUES (new.id, {new_lastname}, {new_firstname});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON students
+    WHEN (SELECT active FROM students_bulk_load) = 0 BEGIN
+        INSERT INTO {index}({index}, rowid, lastname, firstname)
+        VALUES ('delete', old.id, {old_lastname}, {old_firstname});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE OF lastname, firstname ON students BEGIN
+        INSERT INTO {index}({index}, rowid, lastname, firstname)
+        VALUES ('delete', old.id, {old_lastname}, {old_firstname});
+        INSERT INTO {index}(rowid, lastname, firstname)
+        VALUES (new.id, {new_lastname}, {new_firstname});
+    END
+    """,
+)
+
+SEARCH_MODES = ('prefix', 'fuzzy')
+
+# Фамилия весит больше имени при ранжировании, веса сохраняются в настройке rank индекса
+SEARCH_WEIGHTS = (2.0, 1.0)
+
+# bm25 считается для каждого совпадения, поэтому запрос из одних однобуквенных слов,
+# который совпадает с большей частью таблицы, отклоняется
+SEARCH_MIN_TERM_LENGTH = 2
+
+# Нечеткий поиск ранжирует не больше стольких кандидатов с наименьшими id: у частых
+# фамилий совпадений сотни тысяч, и bm25 для всех них считался бы секунды
+SEARCH_FUZZY_CANDIDATES = 10_000
+
+
+# Гистограмма оценок по курсам и факультетам. Оценки лежат в диапазоне 0..100, поэтому
+# ранг студента и порог перцентиля считаются по не более чем 101 строке гистограммы
+RANKING_GROUPS = ('course', 'faculty')
+
+PERCENTILE_SIDES = ('top', 'bottom')
+
+SCORE_COUNTS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS student_score_counts (
+    group_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (group_type, name, score)
+) WITHOUT ROWID
+"""
+
+SCORE_COUNTS_TRIGGERS_DDL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS score_counts_{group}_ai AFTER INSERT ON students
+    WHEN (SELECT active FROM students_bulk_load) = 0 BEGIN
+        INSERT INTO student_score_counts VALUES ('{group}', new.{group}, new.score, 1)
+        ON CONFLICT (group_type, name, score) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS score_counts_{group}_ad AFTER DELETE ON students
+    WHEN (SELECT active FROM students_bulk_load) = 0 BEGIN
+        UPDATE student_score_counts SET count = count - 1
+        WHERE group_type = '{group}' AND name = old.{group} AND score = old.score;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS score_counts_{group}_au AFTER UPDATE OF {group}, score ON students BEGIN
+        UPDATE student_score_counts SET count = count - 1
+        WHERE group_type = '{group}' AND name = old.{group} AND score = old.score;
+        INSERT INTO student_score_counts VALUES ('{group}', new.{group}, new.score, 1)
+        ON CONFLICT (group_type, name, score) DO UPDATE SET count = count + 1;
+    END
+    """,
+)
+
+
+def score_counts_fill_sql(group: str, condition: str = '') -> str:
+    return (
+        f"INSERT INTO student_score_counts "
+        f"SELECT '{group}', {group}, score, COUNT(*) FROM students {condition} GROUP BY {group}, score "
+        f"ON CONFLICT (group_type, name, score) DO UPDATE SET count = count + excluded.count"
+    )
+
+
+def normalize_sql(column: str) -> str:
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def normalize_name(value: str) -> str:
+    return value.casefold().replace('ё', 'е')
+
+
+def create_triggers_ddl() -> List[str]:
+    statements = [
+        statement.format(
+            index=index,
+            new_lastname=normalize_sql('new.lastname'),
+            new_firstname=normalize_sql('new.firstname'),
+            old_lastname=normalize_sql('old.lastname'),
+            old_firstname=normalize_sql('old.firstname'),
+        )
+        for index in SEARCH_INDEXES
+        for statement in SEARCH_TRIGGERS_DDL
+    ]
+    statements += [
+        statement.format(group=group)
+        for group in RANKING_GROUPS
+        for statement in SCORE_COUNTS_TRIGGERS_DDL
+    ]
+    return statements
+
+
+# Строки одной массовой вставки: их id передаются одним JSON-массивом
+INSERTED_IDS_CONDITION = "WHERE id IN (SELECT value FROM json_each(:ids))"
+
+
+def search_index_fill_sql(index: str, condition: str = '') -> str:
+    return (
+        f"INSERT INTO {index}(rowid, lastname, firstname) "
+        f"SELECT id, {normalize_sql('lastname')}, {normalize_sql('firstname')} FROM students {condition}"
+    )
+
+
+def search_terms(query: str) -> List[str]:
+    terms = re.findall(r'\w+', normalize_name(query))
+    if terms and all(len(term) < SEARCH_MIN_TERM_LENGTH for term in terms):
+        raise ValueError(f"Запрос должен содержать слово не короче {SEARCH_MIN_TERM_LENGTH} символов")
+    return terms
+
+
+def check_search_mode(mode: str):
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Неизвестный режим поиска: {mode}")
+
+
+def prefix_match(terms: List[str]) -> str:
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def fuzzy_term_match(term: str) -> str:
+    # Слово делится на куски не короче триграммы, и в строке должны встретиться все куски,
+    # кроме одного: опечатка портит не больше одного куска. Короткое слово на два куска
+    # не делится, для него достаточно любой из его триграмм
+    count = len(term) // 3
+    if count < 2:
+        return ' OR '.join(f'"{term[i:i + 3]}"' for i in range(len(term) - 2))
+    
+    pieces = [term[round(i * len(term) / count):round((i + 1) * len(term) / count)] for i in range(count)]
+    return ' OR '.join(
+        '(' + ' AND '.join(f'"{piece}"' for piece in group) + ')'
+        for group in combinations(pieces, count - 1)
+    )
+
+
+def build_search_query(query: str, mode: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    # Возвращает индекс, запрос MATCH к нему и необязательный префиксный фильтр по students_fts
+    check_search_mode(mode)
+    terms = search_terms(query)
+    if not terms:
+        return None
+    
+    if mode == 'fuzzy':
+        # Нечеткий поиск: каждое слово должно совпасть с точностью до опечатки, а кандидаты
+        # ранжируются по всем триграммам запроса, чем больше общих триграмм, тем выше ранг.
+        # Слова короче триграммы не дают ни одной триграммы и остаются обязательными префиксами
+        long_terms = [term for term in terms if len(term) >= 3]
+        short_terms = [term for term in terms if len(term) < 3]
+        trigrams = dict.fromkeys(
+            term[i:i + 3] for term in long_terms for i in range(len(term) - 2)
+        )
+        if trigrams:
+            candidates = ' AND '.join(f'({fuzzy_term_match(term)})' for term in long_terms)
+            ranking = ' OR '.join(f'"{trigram}"' for trigram in trigrams)
+            return (
+                'students_trigram',
+                f'({candidates}) AND ({ranking})',
+                prefix_match(short_terms) if short_terms else None,
+            )
+    
+    return 'students_fts', prefix_match(terms), None
+
 
 class Student(Base):
     __tablename__ = 'students'
@@ -18,24 +255,147 @@ class Student(Base):
     course = Column(String(100), nullable=False)
     score = Column(Integer, nullable=False)
     
+    __table_args__ = (
+        Index('ix_students_course_score', 'course', 'score'),
+        Index('ix_students_faculty_score', 'faculty', 'score'),
+    )
+    
     def __repr__(self):
         return f"<Student('{self.lastname} {self.firstname}', faculty='{self.faculty}', course='{self.course}', score={self.score})>"
 
 
 class StudentDatabase:
     
-    def __init__(self, db_url: str = 'sqlite:///students.db'):
-        self.engine = create_engine(db_url, echo=False)
+    def __init__(self, db_url: str = 'sqlite:///students.db', tuned: bool = False):
+        self.engine = self._create_engine(db_url, tuned)
         self.SessionLocal = sessionmaker(bind=self.engine)
+        self._unit_of_work: ContextVar[Optional[Session]] = ContextVar(f'unit_of_work_{id(self)}', default=None)
         Base.metadata.create_all(self.engine)
+        self._create_indexes()
+    
+    @staticmethod
+    def _create_engine(db_url: str, tuned: bool):
+        if not tuned:
+            return create_engine(db_url, echo=False)
+        
+        url = make_url(db_url)
+        if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+            # Каждое соединение с :memory: открывает свою пустую базу, поэтому все потоки
+            # работают через одно общее соединение
+            engine = create_engine(
+                db_url,
+                echo=False,
+                poolclass=StaticPool,
+                connect_args={'check_same_thread': False},
+            )
+        else:
+            engine = create_engine(
+                db_url,
+                echo=False,
+                pool_size=POOL_SIZE,
+                max_overflow=MAX_OVERFLOW,
+                pool_timeout=POOL_TIMEOUT,
+            )
+        
+        if url.get_backend_name() == 'sqlite':
+            event.listen(engine, 'connect', apply_sqlite_pragmas)
+        return engine
+    
+    def _create_indexes(self):
+        # create_all не добавляет индексы к уже существующей таблице
+        for index in Student.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+        
+        if self.engine.dialect.name != 'sqlite':
+            return
+        
+        with self.engine.begin() as connection:
+            for statement in BULK_LOAD_DDL:
+                connection.exec_driver_sql(statement)
+            self._create_search_index(connection)
+            self._create_score_counts(connection)
+            self._create_triggers(connection)
+    
+    @staticmethod
+    def _table_exists(connection, name: str) -> bool:
+        return connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': name}
+        ).first() is not None
+    
+    def _create_search_index(self, connection):
+        for index, options in SEARCH_INDEXES.items():
+            exists = self._table_exists(connection, index)
+            
+            connection.exec_driver_sql(SEARCH_TABLE_DDL.format(index=index, options=options))
+            connection.exec_driver_sql(
+                f"INSERT INTO {index}({index}, rank) "
+                f"VALUES ('rank', 'bm25({SEARCH_WEIGHTS[0]}, {SEARCH_WEIGHTS[1]})')"
+            )
+            
+            if not exists:
+                # Индекс добавлен к уже существующей базе: заполняем его текущими данными
+                connection.exec_driver_sql(search_index_fill_sql(index))
+    
+    def _create_score_counts(self, connection):
+        exists = self._table_exists(connection, 'student_score_counts')
+        connection.exec_driver_sql(SCORE_COUNTS_TABLE_DDL)
+        
+        if not exists:
+            for group in RANKING_GROUPS:
+                connection.exec_driver_sql(score_counts_fill_sql(group))
+    
+    @staticmethod
+    def _create_triggers(connection):
+        for statement in create_triggers_ddl():
+            connection.exec_driver_sql(statement)
     
     def get_session(self) -> Session:
         return self.SessionLocal()
     
-    def insert_student(self, lastname: str, firstname: str, faculty: str, 
-                      course: str, score: int) -> Student:
+    @contextmanager
+    def unit_of_work(self) -> Iterator[Session]:
+        session = self._unit_of_work.get()
+        if session is not None:
+            # Вложенный unit_of_work присоединяется к внешней транзакции
+            yield session
+            return
+        
+        session = self.SessionLocal(expire_on_commit=False)
+        token = self._unit_of_work.set(session)
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            self._unit_of_work.reset(token)
+            session.close()
+    
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        session = self._unit_of_work.get()
+        if session is not None:
+            yield session
+            return
+        
         session = self.get_session()
         try:
+            yield session
+        finally:
+            session.close()
+    
+    def _commit(self, session: Session):
+        # Внутри unit_of_work фиксация откладывается до выхода из контекста
+        if session is self._unit_of_work.get():
+            session.flush()
+        else:
+            session.commit()
+    
+    def insert_student(self, lastname: str, firstname: str, faculty: str, 
+                      course: str, score: int) -> Student:
+        with self._session() as session:
             student = Student(
                 lastname=lastname,
                 firstname=firstname,
@@ -44,40 +404,46 @@ class StudentDatabase:
                 score=score
             )
             session.add(student)
-            session.commit()
+            self._commit(session)
             session.refresh(student)
             return student
-        finally:
-            session.close()
     
     def insert_students_bulk(self, students_data: List[Dict]) -> int:
-        session = self.get_session()
-        try:
-            session.bulk_insert_mappings(Student, students_data)
-            session.commit()
+        with self._session() as session:
+            if self.engine.dialect.name == 'sqlite':
+                self._bulk_insert_indexed(session, students_data)
+            else:
+                session.bulk_insert_mappings(Student, students_data)
+            self._commit(session)
             return len(students_data)
-        finally:
-            session.close()
+    
+    def _bulk_insert_indexed(self, session: Session, students_data: List[Dict]):
+        # Поисковый индекс и гистограмма оценок заполняются INSERT ... SELECT вместо построчных триггеров.
+        # Индексируются id, возвращенные самой вставкой: строки с явно переданным id
+        # могут оказаться ниже текущего максимума
+        if not students_data:
+            return
+        session.execute(text("UPDATE students_bulk_load SET active = 1"))
+        ids = session.execute(insert(Student).returning(Student.id), students_data).scalars().all()
+        inserted = {'ids': json.dumps(ids)}
+        for index in SEARCH_INDEXES:
+            session.execute(text(search_index_fill_sql(index, INSERTED_IDS_CONDITION)), inserted)
+        for group in RANKING_GROUPS:
+            session.execute(text(score_counts_fill_sql(group, INSERTED_IDS_CONDITION)), inserted)
+        session.execute(text("UPDATE students_bulk_load SET active = 0"))
     
     def select_all(self, skip: int = 0, limit: int = 100) -> List[Student]:
-        session = self.get_session()
-        try:
+        with self._session() as session:
             return session.query(Student).offset(skip).limit(limit).all()
-        finally:
-            session.close()
     
     def select_by_id(self, student_id: int) -> Optional[Student]:
-        session = self.get_session()
-        try:
+        with self._session() as session:
             return session.query(Student).filter(Student.id == student_id).first()
-        finally:
-            session.close()
     
     def update_student(self, student_id: int, lastname: Optional[str] = None,
                       firstname: Optional[str] = None, faculty: Optional[str] = None,
                       course: Optional[str] = None, score: Optional[int] = None) -> Optional[Student]:
-        session = self.get_session()
-        try:
+        with self._session() as session:
             student = session.query(Student).filter(Student.id == student_id).first()
             if not student:
                 return None
@@ -93,26 +459,23 @@ class StudentDatabase:
             if score is not None:
                 student.score = score
             
-            session.commit()
+            self._commit(session)
             session.refresh(student)
             return student
-        finally:
-            session.close()
     
     def delete_student(self, student_id: int) -> bool:
-        session = self.get_session()
-        try:
+        with self._session() as session:
             student = session.query(Student).filter(Student.id == student_id).first()
             if not student:
                 return False
             
             session.delete(student)
-            session.commit()
+            self._commit(session)
             return True
-        finally:
-            session.close()
     
-    def load_from_csv(self, csv_file: str) -> int:
+    def load_from_csv(self, csv_file: str, batch_size: int = LOAD_BATCH_SIZE) -> int:
+        # Файл читается и вставляется пачками, чтобы загрузка не держала в памяти всю таблицу
+        count = 0
         students_data = []
         
         with open(csv_file, 'r', encoding='utf-8') as file:
@@ -126,50 +489,230 @@ class StudentDatabase:
                     'course': row['Курс'],
                     'score': int(row['Оценка'])
                 })
+                if len(students_data) >= batch_size:
+                    count += self.insert_students_bulk(students_data)
+                    students_data = []
         
-        return self.insert_students_bulk(students_data)
+        if students_data:
+            count += self.insert_students_bulk(students_data)
+        return count
     
     def get_students_by_faculty(self, faculty: str) -> List[Student]:
-        session = self.get_session()
-        try:
+        with self._session() as session:
             return session.query(Student).filter(Student.faculty == faculty).all()
-        finally:
-            session.close()
     
     def get_unique_courses(self) -> List[str]:
-        session = self.get_session()
-        try:
+        with self._session() as session:
             courses = session.query(Student.course).distinct().all()
             return [course[0] for course in courses]
-        finally:
-            session.close()
     
     def get_average_score_by_faculty(self, faculty: str) -> float:
-        session = self.get_session()
-        try:
+        with self._session() as session:
             result = session.query(
                 func.avg(Student.score)
             ).filter(Student.faculty == faculty).scalar()
             
             return round(result, 2) if result else 0.0
-        finally:
-            session.close()
     
     def get_students_by_course_low_score(self, course: str, threshold: int = 30) -> List[Student]:
-        session = self.get_session()
-        try:
+        with self._session() as session:
             return session.query(Student).filter(
                 Student.course == course,
                 Student.score < threshold
             ).all()
-        finally:
-            session.close()
+    
+    def search_students(self, query: str, mode: str = 'prefix', skip: int = 0,
+                        limit: int = 100) -> List[Tuple[Student, float]]:
+        if self.engine.dialect.name != 'sqlite':
+            check_search_mode(mode)
+            return self._search_students_like(query, skip, limit)
+        
+        search = build_search_query(query, mode)
+        if search is None:
+            return []
+        index, match, prefix_filter = search
+        
+        params = {'match': match, 'prefix_filter': prefix_filter, 'limit': limit, 'skip': skip}
+        bound = ""
+        with self._session() as session:
+            if index == 'students_trigram':
+                # Ранжируются только кандидаты до id, на котором набирается SEARCH_FUZZY_CANDIDATES
+                # совпадений; сам этот id находится без подсчета bm25
+                params['last_candidate'] = session.execute(
+                    text(f"SELECT rowid FROM {index} WHERE {index} MATCH :match LIMIT 1 OFFSET :offset"),
+                    dict(params, offset=max(SEARCH_FUZZY_CANDIDATES, skip + limit) - 1)
+                ).scalar()
+                if params['last_candidate'] is not None:
+                    bound = "AND rowid <= :last_candidate "
+            
+            # +rowid не дает планировщику передать список IN в FTS5 как поиск по rowid
+            # для каждого значения, фильтр применяется к уже найденным совпадениям
+            condition = bound + (
+                f"AND +rowid IN (SELECT rowid FROM students_fts WHERE students_fts MATCH :prefix_filter {bound}) "
+                if prefix_filter else ""
+            )
+            ranked = session.execute(
+                text(
+                    f"SELECT rowid, -rank FROM {index} WHERE {index} MATCH :match {condition}"
+                    f"ORDER BY rank LIMIT :limit OFFSET :skip"
+                ),
+                params
+            ).all()
+            
+            students = {
+                student.id: student
+                for student in session.query(Student).filter(Student.id.in_([row[0] for row in ranked]))
+            }
+            return [(students[student_id], relevance) for student_id, relevance in ranked if student_id in students]
+    
+    def _search_students_like(self, query: str, skip: int, limit: int) -> List[Tuple[Student, float]]:
+        # Без FTS5 поиск идет по префиксу через LIKE, нечеткий режим не поддерживается
+        terms = search_terms(query)
+        if not terms:
+            return []
+        
+        lastname = func.replace(func.lower(Student.lastname), 'ё', 'е')
+        firstname = func.replace(func.lower(Student.firstname), 'ё', 'е')
+        conditions = []
+        relevance = 0
+        for term in terms:
+            pattern = term.replace('_', '\\_') + '%'
+            lastname_match = lastname.like(pattern, escape='\\')
+            firstname_match = firstname.like(pattern, escape='\\')
+            conditions.append(or_(lastname_match, firstname_match))
+            relevance = relevance + case((lastname_match, SEARCH_WEIGHTS[0]), else_=0.0) \
+                + case((firstname_match, SEARCH_WEIGHTS[1]), else_=0.0)
+        
+        relevance = relevance.label('relevance')
+        with self._session() as session:
+            rows = session.query(Student, relevance).filter(*conditions).order_by(
+                relevance.desc(), Student.id
+            ).offset(skip).limit(limit).all()
+            return [(student, float(score)) for student, score in rows]
+    
+    @staticmethod
+    def _group_column(group: str) -> Column:
+        if group not in RANKING_GROUPS:
+            raise ValueError(f"Неизвестная группа: {group}")
+        return getattr(Student, group)
+    
+    def _score_histogram(self, session: Session, group: str, name: str) -> List[Tuple[int, int]]:
+        column = self._group_column(group)
+        if self.engine.dialect.name == 'sqlite':
+            rows = session.execute(
+                text(
+                    "SELECT score, count FROM student_score_counts "
+                    "WHERE group_type = :group AND name = :name AND count > 0 ORDER BY score DESC"
+                ),
+                {'group': group, 'name': name}
+            ).all()
+        else:
+            rows = session.query(Student.score, func.count()).filter(
+                column == name
+            ).group_by(Student.score).order_by(Student.score.desc()).all()
+        
+        return [(score, count) for score, count in rows]
+    
+    @staticmethod
+    def _rank(histogram: List[Tuple[int, int]], score: int) -> int:
+        return 1 + sum(count for other, count in histogram if other > score)
+    
+    def _ranked_students(self, group: str, name: str, limit: int,
+                         descending: bool) -> List[Tuple[Student, int]]:
+        with self._session() as session:
+            histogram = self._score_histogram(session, group, name)
+            order = (Student.score.desc(), Student.id.desc()) if descending else (Student.score, Student.id)
+            students = session.query(Student).filter(
+                self._group_column(group) == name
+            ).order_by(*order).limit(limit).all()
+            return [(student, self._rank(histogram, student.score)) for student in students]
+    
+    def get_top_students(self, group: str, name: str, limit: int = 10) -> List[Tuple[Student, int]]:
+        return self._ranked_students(group, name, limit, descending=True)
+    
+    def get_bottom_students(self, group: str, name: str, limit: int = 10) -> List[Tuple[Student, int]]:
+        return self._ranked_students(group, name, limit, descending=False)
+    
+    def get_students_by_percentile(self, group: str, name: str, percent: float, side: str = 'bottom',
+                                   skip: int = 0, limit: Optional[int] = None) -> Tuple[Optional[int], int, List[Tuple[Student, int]]]:
+        if side not in PERCENTILE_SIDES:
+            raise ValueError(f"Неизвестная сторона перцентиля: {side}")
+        with self._session() as session:
+            histogram = self._score_histogram(session, group, name)
+            total = sum(count for _, count in histogram)
+            if not total:
+                return None, 0, []
+            
+            needed = max(1, math.ceil(total * percent / 100))
+            covered = 0
+            for cutoff, count in (histogram if side == 'top' else reversed(histogram)):
+                covered += count
+                if covered >= needed:
+                    break
+            
+            query = session.query(Student).filter(self._group_column(group) == name)
+            if side == 'top':
+                query = query.filter(Student.score >= cutoff).order_by(Student.score.desc(), Student.id.desc())
+            else:
+                query = query.filter(Student.score <= cutoff).order_by(Student.score, Student.id)
+            
+            students = query.offset(skip).limit(limit).all()
+            return cutoff, covered, [(student, self._rank(histogram, student.score)) for student in students]
+    
+    def get_score_counts_mismatches(self) -> List[Tuple[str, str, int, int]]:
+        # Группы, в которых сумма гистограммы расходится с числом студентов: (группа, имя, студентов, в гистограмме)
+        if self.engine.dialect.name != 'sqlite':
+            return []
+        
+        mismatches = []
+        with self._session() as session:
+            for group in RANKING_GROUPS:
+                rows = session.execute(
+                    text(
+                        f"SELECT name, SUM(students), SUM(histogram) FROM ("
+                        f"SELECT {group} AS name, COUNT(*) AS students, 0 AS histogram FROM students GROUP BY {group} "
+                        f"UNION ALL "
+                        f"SELECT name, 0, SUM(count) FROM student_score_counts WHERE group_type = :group GROUP BY name"
+                        f") GROUP BY name HAVING SUM(students) != SUM(histogram)"
+                    ),
+                    {'group': group}
+                ).all()
+                mismatches += [(group, name, students, histogram) for name, students, histogram in rows]
+        return mismatches
+    
+    def get_student_rank(self, student_id: int, group: str = 'course') -> Optional[Dict]:
+        self._group_column(group)
+        with self._session() as session:
+            student = session.query(Student).filter(Student.id == student_id).first()
+            if not student:
+                return None
+            
+            name = getattr(student, group)
+            histogram = self._score_histogram(session, group, name)
+            total = sum(count for _, count in histogram)
+            lower = sum(count for score, count in histogram if score < student.score)
+            
+            return {
+                'student_id': student.id,
+                'group': group,
+                'name': name,
+                'score': student.score,
+                'rank': self._rank(histogram, student.score),
+                'total': total,
+                'percentile': round(100 * lower / total, 2) if total else 0.0
+            }
     
     def clear_all(self):
-        session = self.get_session()
-        try:
-            session.query(Student).delete()
-            session.commit()
-        finally:
-            session.close()
+        with self._session() as session:
+            if self.engine.dialect.name == 'sqlite':
+                # Поисковые индексы и гистограмма очищаются целиком вместо построчного удаления триггерами
+                session.execute(text("UPDATE students_bulk_load SET active = 1"))
+                for index in SEARCH_INDEXES:
+                    session.execute(text(f"INSERT INTO {index}({index}) VALUES ('delete-all')"))
+                session.execute(text("DELETE FROM student_score_counts"))
+                session.query(Student).delete()
+                session.execute(text("UPDATE students_bulk_load SET active = 0"))
+            else:
+                session.query(Student).delete()
+            self._commit(session)
 
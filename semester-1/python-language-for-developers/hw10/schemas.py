@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 
 class StudentBase(BaseModel):
@@ -29,6 +29,34 @@ class StudentResponse(StudentBase):
         from_attributes = True
 
 
+class StudentSearchResponse(StudentResponse):
+    relevance: float
+
+
+class RankedStudentResponse(StudentResponse):
+    rank: int
+
+
+class PercentileResponse(BaseModel):
+    group: str
+    name: str
+    percent: float
+    side: str
+    cutoff_score: int
+    count: int
+    students: List[RankedStudentResponse]
+
+
+class StudentRankResponse(BaseModel):
+    student_id: int
+    group: str
+    name: str
+    score: int
+    rank: int
+    total: int
+    percentile: float
+
+
 class AverageScoreResponse(BaseModel):
     faculty: str
     average_score: float